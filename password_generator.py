@@ -13,8 +13,12 @@ Generates random passwords that meet the following requirements:
 - No character class repeats more than 3 times consecutively
 """
 
+from __future__ import annotations
+
+import os
 import platform
 import secrets
+import shutil
 import string
 import subprocess
 
@@ -34,39 +38,77 @@ ALL_CHAR_CLASSES = [
 
 MIN_LENGTH = 20
 MIN_CLASSES = 4
+MAX_CONSECUTIVE = 3  # Longest allowed run of a single character class
 FORBIDDEN_FIRST_CHARS = "!()[]{}*.#$"  # Characters that cannot be first
 
+# Lookup table of the above: _FORBIDDEN_FIRST_LUT[b] is 1 iff byte b is forbidden
+_FORBIDDEN_FIRST_LUT = bytes(
+    1 if chr(i) in FORBIDDEN_FIRST_CHARS else 0 for i in range(256)
+)
+
+# Combined character pool, as text and as ASCII bytes
+_ALL_CHARS = UPPERCASE + LOWERCASE + DIGITS + PUNCTUATION
+_ALL_BYTES = _ALL_CHARS.encode("ascii")
+
+# Maps a byte value to the index of its class in ALL_CHAR_CLASSES (255 = none)
+_CLASS_LUT = bytearray([255]) * 256
+for _class_id, (_, _chars) in enumerate(ALL_CHAR_CLASSES):
+    for _c in _chars:
+        _CLASS_LUT[ord(_c)] = _class_id
+_CLASS_LUT = bytes(_CLASS_LUT)
+_ALL_CLASSES_MASK = (1 << len(ALL_CHAR_CLASSES)) - 1
+
+# Shared CSPRNG instance, so one isn't created on every call
+_SYS_RAND = secrets.SystemRandom()
+
+# Byte pools used to build passwords that are valid by construction
+_NOT_UPPER = (LOWERCASE + DIGITS + PUNCTUATION).encode("ascii")
+_NOT_LOWER = (UPPERCASE + DIGITS + PUNCTUATION).encode("ascii")
+_NOT_DIGIT = (UPPERCASE + LOWERCASE + PUNCTUATION).encode("ascii")
+_NOT_PUNCT = (UPPERCASE + LOWERCASE + DIGITS).encode("ascii")
+_NOT_CLASS = (_NOT_UPPER, _NOT_LOWER, _NOT_DIGIT, _NOT_PUNCT)  # By class index
+_FIRST_POOL = bytes(b for b in _ALL_BYTES if not _FORBIDDEN_FIRST_LUT[b])
+
+
+def _seen_mask(pw_bytes: bytes) -> int:
+    """Return a bitmask with bit i set if class i of ALL_CHAR_CLASSES is present."""
+    mask = 0
+    # translate() maps every byte to its class index in a single C-level pass
+    for char_class in set(pw_bytes.translate(_CLASS_LUT)):
+        if char_class < len(ALL_CHAR_CLASSES):
+            mask |= 1 << char_class
+    return mask
+
+
+def _class_mask(password: str) -> int:
+    """Return the class bitmask (see _seen_mask) of a password string."""
+    # Characters outside ASCII belong to no class, so they can be dropped
+    return _seen_mask(password.encode("ascii", "ignore"))
+
 
 def check_password_classes(password: str) -> dict[str, bool]:
     """Check which character classes are present in the password."""
+    mask = _class_mask(password)
     return {
-        "Uppercase": any(c in UPPERCASE for c in password),
-        "Lowercase": any(c in LOWERCASE for c in password),
-        "Digits": any(c in DIGITS for c in password),
-        "Special Chars": any(c in PUNCTUATION for c in password),
+        class_name: bool(mask & (1 << class_id))
+        for class_id, (class_name, _) in enumerate(ALL_CHAR_CLASSES)
     }
 
 
 def count_classes(password: str) -> int:
     """Count how many character classes are present in the password."""
-    classes = check_password_classes(password)
-    return sum(classes.values())
+    return bin(_class_mask(password)).count("1")
 
 
 def get_char_class(char: str) -> str:
-    """Return the character class name for a given character."""
-    if char in UPPERCASE:
-        return "Uppercase"
-    elif char in LOWERCASE:
-        return "Lowercase"
-    elif char in DIGITS:
-        return "Digits"
-    elif char in PUNCTUATION:
-        return "Special Chars"
+    """Return the character class name for a single character."""
+    char_class = _CLASS_LUT[ord(char)] if ord(char) < 256 else 255
+    if char_class < len(ALL_CHAR_CLASSES):
+        return ALL_CHAR_CLASSES[char_class][0]
     return "Unknown"
 
 
-def has_consecutive_class_run(password: str, max_consecutive: int = 3) -> bool:
+def has_consecutive_class_run(password: str, max_consecutive: int = MAX_CONSECUTIVE) -> bool:
     """
     Check if any character class appears more than max_consecutive times in a row.
     
@@ -80,11 +122,14 @@ def has_consecutive_class_run(password: str, max_consecutive: int = 3) -> bool:
     if len(password) <= max_consecutive:
         return False
     
-    current_class = get_char_class(password[0])
+    lut = _CLASS_LUT
+    # Non-ASCII characters become "?", which shares the no-class id 255
+    pw = password.encode("ascii", "replace")
+    current_class = lut[pw[0]]
     consecutive_count = 1
     
-    for char in password[1:]:
-        char_class = get_char_class(char)
+    for b in pw[1:]:
+        char_class = lut[b]
         if char_class == current_class:
             consecutive_count += 1
             if consecutive_count > max_consecutive:
@@ -96,44 +141,183 @@ def has_consecutive_class_run(password: str, max_consecutive: int = 3) -> bool:
     return False
 
 
-def generate_password(length: int = MIN_LENGTH) -> str:
+def _random_bytes(pool: bytes, count: int) -> bytes:
+    """
+    Draw bytes uniformly from a pool using batched os.urandom reads.
+
+    Each random byte is masked down to the smallest power of two covering the
+    pool, and indices past the end of the pool are rejected to avoid bias.
+
+    Args:
+        pool: The bytes to draw from (at most 256 entries)
+        count: Number of bytes to draw
+
+    Returns:
+        count bytes chosen uniformly at random from pool
+    """
+    pool_size = len(pool)
+    mask = (1 << (pool_size - 1).bit_length()) - 1
+    out = bytearray()
+    
+    while len(out) < count:
+        for b in os.urandom(2 * (count - len(out))):
+            idx = b & mask
+            if idx < pool_size:
+                out.append(pool[idx])
+                if len(out) == count:
+                    break
+    
+    return bytes(out)
+
+
+def _add_missing_classes(buf: bytearray) -> None:
+    """
+    Overwrite bytes in place until every character class is present.
+
+    Only positions after the first are touched, and only characters whose
+    class occurs elsewhere in the password are replaced. A missing class has
+    no neighbours of its own, so the swap can never create a new run.
+
+    Args:
+        buf: The ASCII password bytes to patch
+    """
+    counts = [0] * len(ALL_CHAR_CLASSES)
+    for b in buf:
+        counts[_CLASS_LUT[b]] += 1
+
+    for class_id, (_, chars) in enumerate(ALL_CHAR_CLASSES):
+        if counts[class_id]:
+            continue
+        candidates = [
+            i for i in range(1, len(buf))
+            if counts[_CLASS_LUT[buf[i]]] > 1
+        ]
+        i = _SYS_RAND.choice(candidates)
+        counts[_CLASS_LUT[buf[i]]] -= 1
+        counts[class_id] += 1
+        buf[i] = ord(secrets.choice(chars))
+
+
+def _make_valid(buf: bytearray) -> int:
+    """
+    Turn uniformly drawn password bytes into a valid password in place.
+
+    A forbidden first character and any character that would extend a class
+    run past MAX_CONSECUTIVE are redrawn from the allowed pool for that
+    position, then any missing character class is spliced in.
+
+    Args:
+        buf: Password bytes drawn uniformly from the full character pool
+    
+    Returns:
+        The class bitmask of the final password (see _seen_mask)
+    """
+    # Redraw a forbidden first character from the allowed pool
+    if _FORBIDDEN_FIRST_LUT[buf[0]]:
+        buf[0] = secrets.choice(_FIRST_POOL)
+    run_class = _CLASS_LUT[buf[0]]
+    run_length = 1
+    
+    for i in range(1, len(buf)):
+        char_class = _CLASS_LUT[buf[i]]
+        
+        # Once a class has run its maximum, the next character must differ
+        if run_length == MAX_CONSECUTIVE and char_class == run_class:
+            buf[i] = secrets.choice(_NOT_CLASS[run_class])
+            char_class = _CLASS_LUT[buf[i]]
+        
+        if char_class == run_class:
+            run_length += 1
+        else:
+            run_class = char_class
+            run_length = 1
+    
+    # Splice in any character class the draw happened to miss
+    seen_mask = _seen_mask(buf)
+    if seen_mask != _ALL_CLASSES_MASK:
+        _add_missing_classes(buf)
+        seen_mask = _seen_mask(buf)
+    return seen_mask
+
+
+def generate_password(
+    length: int = MIN_LENGTH, return_meta: bool = False
+) -> str | tuple[str, int]:
     """
     Generate a secure random password.
     
     Args:
         length: Desired password length (minimum 20)
+        return_meta: Also return the password's class bitmask
     
     Returns:
-        A password meeting all requirements
+        A password meeting all requirements, or a (password, seen_mask) pair
+        if return_meta is set, where bit i of seen_mask is set if class i of
+        ALL_CHAR_CLASSES is present
     """
     if length < MIN_LENGTH:
         length = MIN_LENGTH
     
-    # Build the combined character pool
-    all_chars = UPPERCASE + LOWERCASE + DIGITS + PUNCTUATION
+    # Draw every position at once from the full pool
+    buf = bytearray(_random_bytes(_ALL_BYTES, length))
+    seen_mask = _make_valid(buf)
     
-    while True:
-        # Ensure we have at least one character from 4 different classes
-        # Pick 4 random classes to guarantee inclusion
-        selected_classes = secrets.SystemRandom().sample(ALL_CHAR_CLASSES, MIN_CLASSES)
-        
-        # Start with one character from each selected class
-        password_chars = [secrets.choice(chars) for _, chars in selected_classes]
-        
-        # Fill the rest with random characters from the full pool
-        remaining_length = length - len(password_chars)
-        password_chars.extend(secrets.choice(all_chars) for _ in range(remaining_length))
-        
-        # Shuffle to avoid predictable positions
-        secrets.SystemRandom().shuffle(password_chars)
-        password = "".join(password_chars)
-        
-        # Verify the password meets requirements
-        if (count_classes(password) >= MIN_CLASSES and 
-            len(password) >= MIN_LENGTH and
-            password[0] not in FORBIDDEN_FIRST_CHARS and
-            not has_consecutive_class_run(password)):
-            return password
+    if return_meta:
+        return buf.decode("ascii"), seen_mask
+    return buf.decode("ascii")
+
+
+def generate_passwords(n: int, length: int = MIN_LENGTH) -> list[str]:
+    """
+    Generate many secure random passwords at once.
+    
+    Args:
+        n: Number of passwords to generate
+        length: Desired password length (minimum 20)
+    
+    Returns:
+        A list of n passwords meeting all requirements
+    """
+    if length < MIN_LENGTH:
+        length = MIN_LENGTH
+    
+    # Draw every position of every password in a single batch
+    raw = memoryview(_random_bytes(_ALL_BYTES, n * length))
+    
+    # Reuse one buffer, overwriting it in place for each password
+    buf = bytearray(length)
+    passwords = []
+    for start in range(0, n * length, length):
+        buf[:] = raw[start:start + length]
+        _make_valid(buf)
+        passwords.append(buf.decode("ascii"))
+    
+    return passwords
+
+
+def _detect_clipboard_cmd() -> list[str] | None:
+    """
+    Find the clipboard command for the current platform.
+    
+    Returns:
+        The command to pipe text into, or None if none is available
+    """
+    system = platform.system()
+    
+    if system == "Darwin":  # macOS
+        return ["pbcopy"]
+    elif system == "Linux":
+        # Prefer xclip, then xsel
+        if shutil.which("xclip"):
+            return ["xclip", "-selection", "clipboard"]
+        if shutil.which("xsel"):
+            return ["xsel", "--clipboard", "--input"]
+    elif system == "Windows":
+        return ["clip"]
+    return None
+
+
+_CLIP_CMD = _detect_clipboard_cmd()
 
 
 def copy_to_clipboard(text: str) -> bool:
@@ -146,29 +330,11 @@ def copy_to_clipboard(text: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    system = platform.system()
+    if _CLIP_CMD is None:
+        return False
     
     try:
-        if system == "Darwin":  # macOS
-            subprocess.run(["pbcopy"], input=text.encode(), check=True)
-        elif system == "Linux":
-            # Try xclip first, then xsel
-            try:
-                subprocess.run(
-                    ["xclip", "-selection", "clipboard"],
-                    input=text.encode(),
-                    check=True
-                )
-            except FileNotFoundError:
-                subprocess.run(
-                    ["xsel", "--clipboard", "--input"],
-                    input=text.encode(),
-                    check=True
-                )
-        elif system == "Windows":
-            subprocess.run(["clip"], input=text.encode(), check=True)
-        else:
-            return False
+        subprocess.run(_CLIP_CMD, input=text, encoding="utf-8", check=True)
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
@@ -176,8 +342,7 @@ def copy_to_clipboard(text: str) -> bool:
 
 def main():
     """Generate and display a password with its characteristics."""
-    password = generate_password()
-    classes = check_password_classes(password)
+    password, seen_mask = generate_password(return_meta=True)
     
     # Copy to clipboard
     clipboard_success = copy_to_clipboard(password)
@@ -189,9 +354,9 @@ def main():
     print(f"  ✓ Length: {len(password)} characters")
     print(f"  ✓ First character is valid")
     print(f"  ✓ No class repeats more than 3x consecutively")
-    print("\nCharacter Classes ({}/4):".format(sum(classes.values())))
-    for class_name, present in classes.items():
-        status = "✓" if present else "✗"
+    print("\nCharacter Classes ({}/4):".format(bin(seen_mask).count("1")))
+    for class_id, (class_name, _) in enumerate(ALL_CHAR_CLASSES):
+        status = "✓" if seen_mask & (1 << class_id) else "✗"
         print(f"  {status} {class_name}")
     print()
     if clipboard_success: